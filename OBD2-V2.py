@@ -2,10 +2,11 @@ import sys
 import time
 import csv
 import threading
+from collections import deque
 from datetime import datetime
 from itertools import cycle
-from queue import Queue
 
+import numpy as np
 from PySide6 import QtCore, QtGui, QtWidgets
 from PySide6.QtCore import Qt
 
@@ -22,8 +23,310 @@ except ImportError:
     print("The 'pyserial' package is not installed. Run: pip install pyserial")
     sys.exit(1)
 
+# Optional: compiles the plot downsampling kernel; NumPy is used without it
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 from matplotlib.figure import Figure
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+
+# Live history retained per PID; matches the largest selectable graph window.
+HISTORY_SECONDS = 3600.0
+# History buffers start this large and double on demand up to their cap
+HISTORY_INITIAL_CAPACITY = 4096
+
+# CSV rows are written by a background thread into a large user-space
+# buffer, in batches of up to CSV_BATCH_ROWS or every CSV_BATCH_INTERVAL s.
+CSV_BUFFER_SIZE = 1 << 20
+CSV_BATCH_ROWS = 64
+CSV_BATCH_INTERVAL = 0.5
+# Buffered rows are pushed to the OS at most this often (seconds)
+CSV_FLUSH_INTERVAL = 1.0
+
+# Lines kept in the event log, both in the widget and in the pending queue
+LOG_MAX_LINES = 5000
+
+# Serial port enumeration is reused for this long (seconds)
+PORT_SCAN_TTL = 0.5
+
+# The polling loop re-checks the adapter link every this many samples
+CONNECTION_CHECK_SAMPLES = 10
+
+# ISO 15031-5 lets one Mode 01 request carry up to six PIDs
+MAX_PIDS_PER_REQUEST = 6
+# ...but only on ISO 15765-4 CAN; these are the ELM327 protocol ids for it
+MULTI_PID_PROTOCOLS = ("6", "7", "8", "9")
+
+# Pause python-OBD's async loop takes after each pass over the watched
+# commands (its default is 0.25 s). The serial round-trips already pace the
+# loop, so this only needs to be long enough to let other threads run.
+ASYNC_CYCLE_DELAY = 0.005
+
+# Spare room added past the newest sample when the time axis must grow, as
+# a fraction of the visible span, so most frames can blit without a relayout
+PLOT_X_HEADROOM = 0.1
+# The y axis is rescaled when the data leaves the range it was last fitted
+# to, or shrinks below this fraction of it
+PLOT_Y_SHRINK = 0.5
+
+# Minimum time between live plot redraws (ms)
+PLOT_FRAME_MS = 250
+
+# Plot theme, matching the Qt stylesheet
+PLOT_BG = "#202124"
+PLOT_FG = "#e8eaed"
+PLOT_GRID = "#3c4043"
+PLOT_MARKER_FACE = "#121314"
+
+
+def m4_downsample(t, v, n_bins: int):
+    """Reduce (t, v) to the first, min, max and last point of each time bin (M4).
+
+    With one bin per horizontal pixel the rendered line is indistinguishable
+    from the full series, so nothing is done until there are more than four
+    points per bin. Expects finite values and non-decreasing ``t``.
+    """
+    n = len(t)
+    if n_bins < 1 or n <= 4 * n_bins:
+        return t, v
+    span = t[-1] - t[0]
+    if span <= 0:
+        return t, v
+
+    if _m4_indices is not None:
+        idx = _m4_indices(t, v, n_bins)
+        return t[idx], v[idx]
+
+    bins = ((t - t[0]) * (n_bins / span)).astype(np.int64)
+    np.minimum(bins, n_bins - 1, out=bins)
+    starts = np.flatnonzero(np.diff(bins, prepend=-1))
+    ends = np.append(starts[1:], n) - 1
+    group = np.repeat(np.arange(len(starts)), ends - starts + 1)
+
+    # First position in each bin that hits the bin's min / max
+    picks = [starts, ends]
+    for reduce in (np.minimum, np.maximum):
+        hits = np.flatnonzero(v == reduce.reduceat(v, starts)[group])
+        picks.append(hits[np.unique(group[hits], return_index=True)[1]])
+
+    idx = np.unique(np.concatenate(picks))
+    return t[idx], v[idx]
+
+
+if njit is not None:
+
+    @njit(cache=True)
+    def _m4_indices(t, v, n_bins):
+        # Single-pass equivalent of the NumPy path in m4_downsample
+        n = t.shape[0]
+        t0 = t[0]
+        scale = n_bins / (t[n - 1] - t0)
+        out = np.empty(4 * n_bins, dtype=np.int64)
+        k = 0
+        i = 0
+        while i < n:
+            b = min(int((t[i] - t0) * scale), n_bins - 1)
+            first = lo = hi = i
+            i += 1
+            while i < n and min(int((t[i] - t0) * scale), n_bins - 1) == b:
+                if v[i] < v[lo]:
+                    lo = i
+                elif v[i] > v[hi]:
+                    hi = i
+                i += 1
+            for j in (first, min(lo, hi), max(lo, hi), i - 1):
+                if k == 0 or out[k - 1] != j:
+                    out[k] = j
+                    k += 1
+        return out[:k]
+
+    def warm_up_m4():
+        # Compile (or load from the on-disk cache) for the dtypes the plots use
+        _m4_indices(np.arange(8, dtype=np.float64), np.zeros(8, dtype=np.float32), 1)
+
+else:
+    _m4_indices = None
+    warm_up_m4 = None
+
+
+def quantity_magnitude(value) -> float:
+    """Numeric value of a pint quantity returned by python-OBD decoders."""
+    return float(value.magnitude)
+
+
+class PidPayload:
+    """Just enough of an obd Message for Mode 01 decoders, which only read ``data``."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytearray):
+        self.data = data
+
+
+def make_pid_batch_command(members):
+    """Build one Mode 01 request for up to six (label, command) pairs.
+
+    The ECU answers with ``41`` followed by ``PID + data`` for each PID it
+    supports. The decoder splits that back into ``{label: value}``, calling
+    each command's decoder directly on its slice of the reply.
+    """
+    # Resolved once here rather than per reply: label, data width, decoder
+    by_pid = {cmd.pid: (label, cmd.bytes - 2, cmd.decode) for label, cmd in members}
+    request = b"01" + b"".join(cmd.command[2:] for _, cmd in members)
+
+    def decode(messages):
+        results = {}
+        for msg in messages:
+            data = msg.data
+            i = 1  # data[0] is the 0x41 response mode
+            while i < len(data):
+                entry = by_pid.get(data[i])
+                if entry is None:
+                    break  # unknown PID, the remaining bytes cannot be framed
+                label, width, decode_pid = entry
+                end = i + 1 + width
+                if end > len(data):
+                    break  # truncated reply
+                results[label] = decode_pid([PidPayload(bytearray((data[0], data[i])) + data[i + 1:end])])
+                i = end
+        return results
+
+    return obd.OBDCommand(
+        "PID_BATCH", "Batched Mode 01 request", request, 0, decode, obd.ECU.ENGINE, True
+    )
+
+
+class SecondFormatter:
+    """strftime for epoch seconds, re-formatting only when the second changes.
+
+    The cache is read and replaced as one tuple, so threads sharing an
+    instance never pair one second with another second's string.
+    """
+
+    def __init__(self, fmt: str):
+        self.fmt = fmt
+        self._cache = (None, "")
+
+    def __call__(self, epoch: float) -> str:
+        sec = int(epoch)
+        cached_sec, text = self._cache
+        if sec != cached_sec:
+            text = time.strftime(self.fmt, time.localtime(sec))
+            self._cache = (sec, text)
+        return text
+
+
+class HistoryBuffer:
+    """Bounded ring of samples stored column-wise.
+
+    All PIDs are sampled together, so one time column is shared and each
+    label gets its own float32 column, with NaN where there was no reading.
+    Storage starts small and doubles until ``max_capacity``; after that the
+    oldest samples are overwritten. With ``retention`` > 0, samples older
+    than that many seconds before the newest one are dropped as well.
+    """
+
+    def __init__(self, labels, max_capacity: int, retention: float = 0.0):
+        self.max_capacity = max(int(max_capacity), 1)
+        self.capacity = min(self.max_capacity, HISTORY_INITIAL_CAPACITY)  # allocated
+        self.retention = retention
+        self.t = np.empty(self.capacity, dtype=np.float64)
+        self.v = {
+            label: np.full(self.capacity, np.nan, dtype=np.float32) for label in labels
+        }
+        self.n = 0
+        self.head = 0  # next write position; the oldest sample is n slots back
+        self.version = 0  # bumped on every append, for caching derived data
+
+    def __len__(self):
+        return self.n
+
+    def extend(self, t, rows):
+        """Append samples at times ``t`` with values from the dicts in ``rows``.
+
+        Each column is converted once (None becomes NaN) and copied in with
+        at most two slice assignments, instead of per-sample stores.
+        """
+        k = len(t)
+        if not k:
+            return
+        t = np.asarray(t, dtype=np.float64)
+        if k > self.max_capacity:
+            # Only the newest max_capacity samples can survive anyway
+            t, rows, k = t[-self.max_capacity:], rows[-self.max_capacity:], self.max_capacity
+        if self.n + k > self.capacity < self.max_capacity:
+            size = self.capacity
+            while size < self.n + k:
+                size *= 2
+            self._grow(min(size, self.max_capacity))
+
+        h = self.head
+        first = min(k, self.capacity - h)  # rest wraps to the front
+        self.t[h:h + first] = t[:first]
+        self.t[:k - first] = t[first:]
+        for label, col in self.v.items():
+            vals = np.array([row.get(label) for row in rows], dtype=np.float32)
+            col[h:h + first] = vals[:first]
+            col[:k - first] = vals[first:]
+        self.head = (h + k) % self.capacity
+        self.n = min(self.n + k, self.capacity)
+
+        if self.retention > 0:
+            # Advance the tail past expired samples; each sample is dropped
+            # at most once, so this is amortised O(1) per sample
+            cutoff = t[-1] - self.retention
+            tail = (self.head - self.n) % self.capacity
+            while self.n > 1 and self.t[tail] < cutoff:
+                tail = (tail + 1) % self.capacity
+                self.n -= 1
+        self.version += 1
+
+    def window(self, span: float = 0.0):
+        """Return (t, {label: v}) in time order, limited to the last ``span`` s if > 0.
+
+        Each ring segment is searched separately so only the requested tail
+        is copied, and views are returned whenever it sits in one segment.
+        """
+        end = self.head or self.capacity
+        start = end - self.n
+        if start >= 0:
+            i0 = start
+            if span > 0 and self.n:
+                i0 += int(np.searchsorted(self.t[start:end], self.t[end - 1] - span))
+            return self._slice(i0, end)
+
+        # Wrapped: [start + capacity:] holds the older samples, [:end] the newer
+        i0 = start + self.capacity
+        if span > 0:
+            t0 = self.t[end - 1] - span
+            if self.t[0] < t0:
+                return self._slice(int(np.searchsorted(self.t[:end], t0)), end)
+            i0 += int(np.searchsorted(self.t[i0:], t0))
+        return (
+            np.concatenate((self.t[i0:], self.t[:end])),
+            {label: np.concatenate((col[i0:], col[:end])) for label, col in self.v.items()},
+        )
+
+    def _grow(self, size: int):
+        # Reallocate with the samples unwrapped to [0:n], oldest first
+        n = self.n
+        order = (self.head - n + np.arange(n)) % self.capacity
+
+        def regrow(old, new):
+            new[:n] = old[order]
+            return new
+
+        self.t = regrow(self.t, np.empty(size, dtype=np.float64))
+        for label, col in self.v.items():
+            self.v[label] = regrow(col, np.full(size, np.nan, dtype=np.float32))
+        self.capacity = size
+        self.head = n
+
+    def _slice(self, i0: int, i1: int):
+        return self.t[i0:i1], {label: col[i0:i1] for label, col in self.v.items()}
+
 
 class GraphWindow(QtWidgets.QMainWindow):
     """Detached graph window that mirrors selections from the main UI."""
@@ -51,11 +354,10 @@ class GraphWindow(QtWidgets.QMainWindow):
         controls.addWidget(self.scale_spin)
         controls.addStretch()
 
-        fig, axes, canvas = self.main_window._create_figure()
-        self.graph_view = {"fig": fig, "axes": axes, "canvas": canvas}
-        self.base_width, self.base_height = fig.get_size_inches()
+        self.graph_view = self.main_window._create_graph_view()
+        self.base_width, self.base_height = self.graph_view["fig"].get_size_inches()
 
-        layout.addWidget(canvas)
+        layout.addWidget(self.graph_view["canvas"])
 
         self.scale_spin.valueChanged.connect(self._on_scale_changed)
 
@@ -65,12 +367,20 @@ class GraphWindow(QtWidgets.QMainWindow):
         fig.set_size_inches(self.base_width * value, self.base_height * value, forward=True)
         canvas.draw_idle()
 
+    def changeEvent(self, event: QtCore.QEvent):
+        if event.type() == QtCore.QEvent.WindowStateChange and not self.isMinimized():
+            self.main_window._on_graph_shown()
+        super().changeEvent(event)
+
     def closeEvent(self, event: QtGui.QCloseEvent):
         self.main_window._on_popup_closed(self.graph_view)
         super().closeEvent(event)
 
 
 class OBDMainWindow(QtWidgets.QMainWindow):
+    # Emitted (from any thread) when the log/sample queues go from empty to non-empty
+    _queues_ready = QtCore.Signal()
+
     def __init__(self):
         super().__init__()
 
@@ -83,22 +393,49 @@ class OBDMainWindow(QtWidgets.QMainWindow):
 
         # OBD state
         self.connection = None
+        # Cached link state, set on connect/disconnect and by the poll loop
+        self._connected = False
         self.polling = False
         self.polling_thread = None
-
-        # Queues for thread-safe comms
-        self.log_queue = Queue()
-        self.data_queue = Queue()
+        self._poll_stop = threading.Event()  # replaced per session
+
+        # Values received since the last sample, filled in by obd.Async
+        # watch callbacks and swapped out by the poll thread
+        self._latest = {}
+        self._latest_lock = threading.Lock()
+
+        # Queues for thread-safe comms. Single producer (poll thread) and
+        # single consumer (GUI thread), so deque's atomic append/popleft is
+        # enough and avoids Queue's lock round-trip. The log queue drops its
+        # oldest lines if the GUI falls behind, as the widget would anyway.
+        self.log_queue = deque(maxlen=LOG_MAX_LINES)
+        self.data_queue = deque()
+        self._drain_pending = False
+        self._queues_ready.connect(self._process_queues, Qt.QueuedConnection)
 
         # CSV logging
         self.log_to_csv = True
         self.csv_file = None
         self.csv_writer = None
-        self.csv_log_labels = []
+        self.csv_log_labels = ()
+        self._csv_queue = deque()
+        self._csv_wakeup = threading.Event()
+        self._csv_thread = None
+        self._csv_running = False
+        self._csv_idle = False  # writer is blocked with nothing to write
+        # Mirrors the "Log samples" checkbox for the poll thread
+        self._log_samples = True
         self.session_start_time = None
 
-        # Data history for plotting: {label: {"t": [], "v": []}}
-        self.data_history = {}
+        # Formatted timestamps only change once per second
+        self._log_ts = SecondFormatter("%H:%M:%S")
+        self._csv_ts = SecondFormatter("%Y-%m-%d %H:%M:%S")
+
+        # Data history for plotting (one shared time column, one column per PID)
+        self.data_history = HistoryBuffer((), 1)
+        # (id(view), label) -> ((history version, window, n_bins), (t, v), bounds);
+        # one entry per pane line, overwritten as the stamp changes
+        self._plot_cache = {}
         self.plot_colors = [
             "#1a73e8",
             "#db4437",
@@ -155,13 +492,27 @@ class OBDMainWindow(QtWidgets.QMainWindow):
             "Oil Temp":                  obd.commands.OIL_TEMP,
             "Fuel Type":                 obd.commands.FUEL_TYPE,
         }
+        # Parallel views of the fixed PID table for start_polling
+        self._cmd_keys = tuple(self.available_commands.keys())
+        self._cmd_vals = tuple(self.available_commands.values())
+
+        # (monotonic time of last scan, port names found)
+        self._ports_cache = (float("-inf"), ())
 
         self._build_ui()
+        self._cb_list = tuple(self.pid_checkboxes[k] for k in self._cmd_keys)
+
+        # Redraws are coalesced: new data arms a single-shot timer, so there
+        # is at most one draw per PLOT_FRAME_MS and no wakeups while idle
+        self._plot_dirty = False
+        self._plot_timer = QtCore.QTimer(self)
+        self._plot_timer.setSingleShot(True)
+        self._plot_timer.setInterval(PLOT_FRAME_MS)
+        self._plot_timer.timeout.connect(self._maybe_refresh_plot)
 
-        # Timer to process log/data queues
-        self.queue_timer = QtCore.QTimer(self)
-        self.queue_timer.timeout.connect(self._process_queues)
-        self.queue_timer.start(100)
+        if warm_up_m4 is not None:
+            # JIT-compile the downsampler off the GUI thread before it is needed
+            threading.Thread(target=warm_up_m4, daemon=True).start()
 
     # ------------------------------------------------------------------
     # Styling / theme
@@ -294,6 +645,26 @@ class OBDMainWindow(QtWidgets.QMainWindow):
         self.port_combo.setMinimumWidth(160)
         conn_layout.addWidget(self.port_combo)
 
+        conn_layout.addWidget(QtWidgets.QLabel("Protocol:"))
+        self.protocol_combo = QtWidgets.QComboBox()
+        self.protocol_combo.addItem("Auto detect", None)
+        for proto_id, proto_name in (
+            ("1", "SAE J1850 PWM"),
+            ("2", "SAE J1850 VPW"),
+            ("3", "ISO 9141-2"),
+            ("4", "ISO 14230-4 KWP (5 baud)"),
+            ("5", "ISO 14230-4 KWP (fast)"),
+            ("6", "ISO 15765-4 CAN 11/500"),
+            ("7", "ISO 15765-4 CAN 29/500"),
+            ("8", "ISO 15765-4 CAN 11/250"),
+            ("9", "ISO 15765-4 CAN 29/250"),
+            ("A", "SAE J1939 CAN"),
+        ):
+            self.protocol_combo.addItem(f"{proto_id}: {proto_name}", proto_id)
+        # 2015 Camaro uses ISO 15765-4 CAN (11 bit ID, 500 kbaud)
+        self.protocol_combo.setCurrentIndex(self.protocol_combo.findData("6"))
+        conn_layout.addWidget(self.protocol_combo)
+
         self.refresh_btn = QtWidgets.QPushButton("Refresh")
         self.refresh_btn.clicked.connect(self.refresh_ports)
         conn_layout.addWidget(self.refresh_btn)
@@ -364,6 +735,20 @@ class OBDMainWindow(QtWidgets.QMainWindow):
 
         controls_layout.addSpacing(20)
 
+        self.batch_pids_checkbox = QtWidgets.QCheckBox("Multi-PID requests")
+        self.batch_pids_checkbox.setToolTip(
+            "Request up to six Mode 01 PIDs per message on CAN vehicles "
+            "(disable if the ECU rejects them)"
+        )
+        self.batch_pids_checkbox.setChecked(True)
+        controls_layout.addWidget(self.batch_pids_checkbox)
+
+        self.log_samples_checkbox = QtWidgets.QCheckBox("Log samples")
+        self.log_samples_checkbox.setToolTip("Echo every sample to the event log")
+        self.log_samples_checkbox.setChecked(True)
+        self.log_samples_checkbox.toggled.connect(self._on_log_samples_changed)
+        controls_layout.addWidget(self.log_samples_checkbox)
+
         self.log_csv_checkbox = QtWidgets.QCheckBox("Log to CSV")
         self.log_csv_checkbox.setChecked(True)
         self.log_csv_checkbox.stateChanged.connect(self._on_log_csv_changed)
@@ -404,6 +789,7 @@ class OBDMainWindow(QtWidgets.QMainWindow):
 
         self.log_edit = QtWidgets.QPlainTextEdit()
         self.log_edit.setReadOnly(True)
+        self.log_edit.setMaximumBlockCount(LOG_MAX_LINES)
         font = QtGui.QFont("Consolas")
         font.setPointSize(9)
         self.log_edit.setFont(font)
@@ -456,7 +842,7 @@ class OBDMainWindow(QtWidgets.QMainWindow):
         # Graph widgets list for convenience
         self.graph_lists = [self.graph_list1, self.graph_list2, self.graph_list3]
         for lst in self.graph_lists:
-            lst.itemChanged.connect(self.refresh_plot)
+            lst.itemChanged.connect(self._on_graph_selection_changed)
 
         # Detached graph window support
         self.popup_window = None
@@ -467,9 +853,9 @@ class OBDMainWindow(QtWidgets.QMainWindow):
 
         # Matplotlib figure with 3 axes
         self.graph_views = []
-        fig, axes, canvas = self._create_figure()
-        self.graph_views.append({"fig": fig, "axes": axes, "canvas": canvas})
-        graph_layout.addWidget(canvas)
+        view = self._create_graph_view()
+        self.graph_views.append(view)
+        graph_layout.addWidget(view["canvas"])
 
         splitter.addWidget(graph_group)
         splitter.setStretchFactor(0, 1)
@@ -487,29 +873,28 @@ class OBDMainWindow(QtWidgets.QMainWindow):
         self.graph_views.append(self.popup_window.graph_view)
         self.popout_btn.setText("Close Graph Window")
         self.popup_window.show()
+        self._rebuild_plot_artists(self.popup_window.graph_view)
         self.refresh_plot()
 
     def _on_popup_closed(self, view):
         if view in self.graph_views:
             self.graph_views.remove(view)
+        for key in [k for k in self._plot_cache if k[0] == id(view)]:
+            del self._plot_cache[key]
         self.popup_window = None
         self.popout_btn.setText("Open Graph Window")
 
     def _style_axis(self, ax, xlabel=False, ylabel=""):
-        ax.cla()
-        ax.set_facecolor("#202124")
+        ax.set_facecolor(PLOT_BG)
         if ax.figure:
-            ax.figure.patch.set_facecolor("#202124")
-        ax.tick_params(colors="#e8eaed", labelsize=9)
-        ax.grid(True, color="#3c4043", linestyle="--", linewidth=0.7, alpha=0.7)
+            ax.figure.patch.set_facecolor(PLOT_BG)
+        ax.tick_params(colors=PLOT_FG, labelsize=9)
+        ax.grid(True, color=PLOT_GRID, linestyle="--", linewidth=0.7, alpha=0.7)
         for spine in ax.spines.values():
-            spine.set_color("#e8eaed")
+            spine.set_color(PLOT_FG)
         if xlabel:
-            ax.set_xlabel("Time (s)", color="#e8eaed")
-        if ylabel:
-            ax.set_ylabel(ylabel, color="#e8eaed")
-        else:
-            ax.set_ylabel("", color="#e8eaed")
+            ax.set_xlabel("Time (s)", color=PLOT_FG)
+        ax.set_ylabel(ylabel, color=PLOT_FG)
 
     def _style_all_axes(self, axes):
         # Only bottom axis gets the X label
@@ -526,6 +911,34 @@ class OBDMainWindow(QtWidgets.QMainWindow):
         canvas = FigureCanvas(fig)
         return fig, axes, canvas
 
+    def _create_graph_view(self):
+        fig, axes, canvas = self._create_figure()
+        view = {
+            "fig": fig,
+            "axes": axes,
+            "canvas": canvas,
+            "lines": [],
+            "ybounds": {},  # axes -> (min, max) of the data y was last fitted to
+            "background": None,
+        }
+        # Any full draw (resize, limit change, selection change) refreshes
+        # the cached background used for blitting
+        canvas.mpl_connect("draw_event", lambda _event: self._on_canvas_draw(view))
+        return view
+
+    def _on_canvas_draw(self, view):
+        view["background"] = view["canvas"].copy_from_bbox(view["fig"].bbox)
+        self._draw_lines(view)
+
+    def _draw_lines(self, view):
+        for ax, lines in zip(view["axes"], view["lines"]):
+            for line in lines.values():
+                ax.draw_artist(line)
+            # The legend is animated too, so it stays on top of the traces
+            legend = ax.get_legend()
+            if legend is not None:
+                ax.draw_artist(legend)
+
     def _populate_graph_lists(self, labels):
         for lst in self.graph_lists:
             lst.blockSignals(True)
@@ -543,7 +956,7 @@ class OBDMainWindow(QtWidgets.QMainWindow):
                 item = lst.item(idx)
                 if item:
                     item.setCheckState(Qt.Checked)
-        self.refresh_plot()
+        self._on_graph_selection_changed()
 
     def _checked_labels(self, list_widget: QtWidgets.QListWidget):
         labels = []
@@ -557,73 +970,69 @@ class OBDMainWindow(QtWidgets.QMainWindow):
     # Logging & queue handling
     # ------------------------------------------------------------------
     def log(self, msg: str):
-        ts = time.strftime("%H:%M:%S")
-        self.log_queue.put(f"[{ts}] {msg}\n")
+        self.log_queue.append(f"[{self._log_ts(time.time())}] {msg}\n")
+        self._notify_queues()
 
-    def _process_queues(self):
-        # Logs
-        try:
-            while True:
-                msg = self.log_queue.get_nowait()
-                self.log_edit.moveCursor(QtGui.QTextCursor.End)
-                self.log_edit.insertPlainText(msg)
-                self.log_edit.moveCursor(QtGui.QTextCursor.End)
-        except Exception:
-            pass
+    def _notify_queues(self):
+        # Only the first item queued since the last drain needs to post an
+        # event; the drain then picks up everything queued meanwhile.
+        if not self._drain_pending:
+            self._drain_pending = True
+            self._queues_ready.emit()
 
-        # Data
-        try:
-            while True:
-                sample = self.data_queue.get_nowait()
-                self._handle_sample(sample)
-        except Exception:
-            pass
-
-    def _handle_sample(self, sample: dict):
+    def _process_queues(self):
+        # Cleared before draining so anything queued from here on re-posts
+        self._drain_pending = False
+
+        # Logs: one insert per drain keeps the text layout pass to one
+        buf = []
+        while self.log_queue:
+            buf.append(self.log_queue.popleft())
+        if buf:
+            self.log_edit.moveCursor(QtGui.QTextCursor.End)
+            self.log_edit.insertPlainText("".join(buf))
+            self.log_edit.moveCursor(QtGui.QTextCursor.End)
+
+        # Data: ingest everything queued, then schedule a single redraw
+        samples = []
+        while self.data_queue:
+            samples.append(self.data_queue.popleft())
+        if not samples:
+            return
         if self.session_start_time is None:
-            self.session_start_time = sample["timestamp"]
-        t_rel = sample["timestamp"] - self.session_start_time
-
-        # Store full session
-        for label, val in sample.items():
-            if label == "timestamp":
-                continue
-            if label not in self.data_history:
-                self.data_history[label] = {"t": [], "v": []}
-            if val is not None:
-                self.data_history[label]["t"].append(t_rel)
-                self.data_history[label]["v"].append(val)
-
-        # CSV write
-        if self.csv_writer is not None:
-            row = [time.strftime("%Y-%m-%d %H:%M:%S",
-                                 time.localtime(sample["timestamp"]))]
-            for lbl in self.csv_log_labels:
-                v = sample.get(lbl)
-                row.append("" if v is None else v)
-            try:
-                self.csv_writer.writerow(row)
-            except Exception as e:
-                self.log(f"CSV write error: {e}")
-                self._close_csv()
+            self.session_start_time = samples[0]["timestamp"]
+        t0 = self.session_start_time
+        self.data_history.extend([s["timestamp"] - t0 for s in samples], samples)
+        self._mark_plot_dirty()
 
-        # Update all plots
-        self.refresh_plot()
+    def _reset_history(self, labels, capacity: int, retention: float = 0.0):
+        # Queued samples were taken for the old history; never feed them to the new one
+        self.data_queue.clear()
+        self.data_history = HistoryBuffer(labels, capacity, retention)
+        self._plot_cache.clear()
 
     # ------------------------------------------------------------------
     # Serial ports / connection
     # ------------------------------------------------------------------
     def refresh_ports(self):
-        ports = [p.device for p in list_ports.comports()]
-        self.port_combo.clear()
-        self.port_combo.addItems(ports)
+        # comports() can take hundreds of ms on Windows; reuse a fresh scan
+        # and leave the combo (and its selection) alone if nothing changed
+        now = time.monotonic()
+        scanned_at, ports = self._ports_cache
+        if now - scanned_at >= PORT_SCAN_TTL:
+            ports = tuple(p.device for p in list_ports.comports())
+            self._ports_cache = (now, ports)
+        shown = tuple(self.port_combo.itemText(i) for i in range(self.port_combo.count()))
+        if ports != shown:
+            self.port_combo.clear()
+            self.port_combo.addItems(ports)
         if ports:
             self.status_label.setText("Select a port and connect")
         else:
             self.status_label.setText("No serial ports found")
 
     def connect_obd(self):
-        if self.connection and self.connection.is_connected():
+        if self._connected:
             self.log("Already connected.")
             self._apply_connected_state()
             vehicle_info = self._fetch_vehicle_details()
@@ -643,8 +1052,16 @@ class OBDMainWindow(QtWidgets.QMainWindow):
         # python-OBD can take a moment to finish the initial handshake. To avoid
         # treating a slow response as a failure (and locking the UI), give the
         # connection a short grace period while keeping the button disabled.
+        # fast=True lets python-OBD append the expected frame count to each
+        # request so the ELM327 answers without waiting out its own timeout.
+        # That is safe for the SAE-standard Mode 01 PIDs in available_commands.
+        # A fixed protocol also skips the auto-detect search on every connect.
+        # The async loop then queries the watched commands back-to-back.
+        protocol = self.protocol_combo.currentData()
         try:
-            self.connection = obd.OBD(port, fast=False, timeout=2.0)
+            self.connection = obd.Async(
+                port, protocol=protocol, fast=True, timeout=1.0, delay_cmds=ASYNC_CYCLE_DELAY
+            )
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, "Error", f"Failed to open port {port}:\n{e}")
             self.log(f"Failed to open port {port}: {e}")
@@ -675,6 +1092,7 @@ class OBDMainWindow(QtWidgets.QMainWindow):
             self.status_label.setText("Disconnected")
             return
 
+        self._connected = True
         self.log("Connected to ECU.")
         self._apply_connected_state(port)
         vehicle_info = self._fetch_vehicle_details()
@@ -683,6 +1101,7 @@ class OBDMainWindow(QtWidgets.QMainWindow):
 
     def disconnect_obd(self):
         self.stop_polling()
+        self._connected = False
         if self.connection:
             try:
                 self.connection.close()
@@ -724,13 +1143,20 @@ class OBDMainWindow(QtWidgets.QMainWindow):
         else:
             self.csv_label.setText("Log file: (auto)")
 
+    def _on_log_samples_changed(self, checked: bool):
+        self._log_samples = checked
+
     def start_polling(self):
-        if not self.connection or not self.connection.is_connected():
+        if not self._connected:
             QtWidgets.QMessageBox.warning(self, "Warning", "Not connected to ECU.")
             return
 
-        labels = [lbl for lbl, cb in self.pid_checkboxes.items() if cb.isChecked()]
-        if not labels:
+        selected = [
+            (lbl, cmd)
+            for lbl, cmd, cb in zip(self._cmd_keys, self._cmd_vals, self._cb_list)
+            if cb.isChecked()
+        ]
+        if not selected:
             QtWidgets.QMessageBox.warning(self, "Warning", "Select at least one PID.")
             return
 
@@ -743,12 +1169,57 @@ class OBDMainWindow(QtWidgets.QMainWindow):
             self.log("Already polling.")
             return
 
-        commands = [self.available_commands[lbl] for lbl in labels]
+        # watch() silently ignores commands the ECU doesn't list as supported,
+        # so say which ones will never produce a value
+        unsupported = [lbl for lbl, cmd in selected if not self.connection.supports(cmd)]
+        if unsupported:
+            self.log(f"Not supported by this vehicle, skipped: {', '.join(unsupported)}")
+        watched = [(lbl, cmd) for lbl, cmd in selected if lbl not in unsupported]
+        if not watched:
+            QtWidgets.QMessageBox.warning(
+                self, "Warning", "None of the selected PIDs are supported by this vehicle."
+            )
+            return
+
+        labels = [lbl for lbl, _ in selected]
+
+        # Subscribe the selected PIDs; obd.Async cycles through them on its
+        # own thread so a sample no longer waits on N serial round-trips.
+        with self._latest_lock:
+            self._latest.clear()
+        self.connection.unwatch_all()
+
+        singles = watched
+        batching = self.batch_pids_checkbox.isChecked()
+        if batching and self.connection.protocol_id() not in MULTI_PID_PROTOCOLS:
+            self.log("Multi-PID requests need a CAN protocol; querying PIDs one at a time")
+            batching = False
+        if batching:
+            batchable = [
+                (lbl, cmd) for lbl, cmd in watched if cmd.mode == 1 and cmd.bytes > 2
+            ]
+            singles = [pair for pair in watched if pair not in batchable]
+            for i in range(0, len(batchable), MAX_PIDS_PER_REQUEST):
+                group = batchable[i:i + MAX_PIDS_PER_REQUEST]
+                group_labels = tuple(lbl for lbl, _ in group)
+                # Custom commands are not in supported_commands, hence force
+                self.connection.watch(
+                    make_pid_batch_command(group),
+                    callback=lambda r, grp=group_labels: self._on_async_batch(grp, r),
+                    force=True,
+                )
+            if batchable:
+                n_requests = -(-len(batchable) // MAX_PIDS_PER_REQUEST)
+                self.log(f"Batching {len(batchable)} PIDs into {n_requests} request(s)")
+
+        for label, cmd in singles:
+            self.connection.watch(
+                cmd, callback=lambda r, lbl=label: self._on_async_value(lbl, r)
+            )
 
-        # Reset in-memory data
-        with self.data_queue.mutex:
-            self.data_queue.queue.clear()
-        self.data_history.clear()
+        # Reset in-memory data. The CSV keeps the full session; memory only
+        # keeps what the graphs can show, by time and by sample count.
+        self._reset_history(labels, int(HISTORY_SECONDS / interval) + 1, HISTORY_SECONDS)
         self.session_start_time = None
 
         # CSV setup
@@ -766,62 +1237,137 @@ class OBDMainWindow(QtWidgets.QMainWindow):
 
         self.log(f"Starting live data: {', '.join(labels)} (every {interval:.2f}s)")
 
+        self.connection.start()
+        self._poll_stop = threading.Event()
         self.polling_thread = threading.Thread(
             target=self._poll_worker,
-            args=(labels, commands, interval),
+            args=(labels, interval, self._poll_stop),
             daemon=True,
         )
         self.polling_thread.start()
 
     def stop_polling(self):
+        # Wake the worker out of its interval wait and let it finish first, so
+        # it can't keep sampling while the async loop winds down or outlive
+        # this session and emit rows into the next one
+        self._poll_stop.set()
+        if self.polling_thread is not None:
+            self.polling_thread.join()
+            self.polling_thread = None
         if self.polling:
             self.polling = False
             self.log("Stopping live data...")
+            if self.connection:
+                self.connection.stop()
+        # Samples still queued for the GUI belong to the finished session
+        self.data_queue.clear()
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
         self._close_csv()
 
-    def _poll_worker(self, labels, commands, interval):
-        while self.polling and self.connection and self.connection.is_connected():
+    def _on_async_value(self, label, resp):
+        # Runs on the obd.Async thread; None marks a failed read (N/A)
+        with self._latest_lock:
+            self._latest[label] = resp.value
+
+    def _on_async_batch(self, labels, resp):
+        # Runs on the obd.Async thread; PIDs missing from the reply read as N/A
+        values = {} if resp.is_null() else resp.value
+        with self._latest_lock:
+            for label in labels:
+                self._latest[label] = values.get(label)
+
+    def _poll_worker(self, labels, interval, stop: threading.Event):
+        """Collect the async values received each interval into one sample."""
+        # Numeric converter per label, resolved from its first real value
+        extractors = {}
+        connection = self.connection
+        n_samples = 0
+        # Sleep to absolute deadlines so the snapshot work doesn't add drift
+        deadline = time.monotonic()
+        while not stop.is_set() and self._connected:
+            deadline += interval
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                if stop.wait(delay):
+                    break
+            elif delay < -interval:
+                # Fell more than a period behind (e.g. system suspend): resync
+                # instead of firing a burst of catch-up samples
+                deadline = time.monotonic()
+            if stop.is_set():
+                break
+
+            n_samples += 1
+            if n_samples % CONNECTION_CHECK_SAMPLES == 0 and not connection.is_connected():
+                self._connected = False
+                self.log("Lost connection to ECU.")
+                break
+
+            # Take only what arrived since the last sample, so a PID the
+            # adapter hasn't re-read is recorded as missing, not repeated
+            with self._latest_lock:
+                latest = self._latest
+                self._latest = {}
+            if not latest:
+                continue
+
             sample = {"timestamp": time.time()}
-            line_parts = []
-            for label, cmd in zip(labels, commands):
-                try:
-                    resp = self.connection.query(cmd)
-                    if resp.is_null():
-                        sample[label] = None
-                        line_parts.append(f"{label}=N/A")
-                    else:
-                        v = resp.value
-                        num = None
-                        try:
-                            if hasattr(v, "magnitude"):
-                                num = float(v.magnitude)
-                            else:
-                                num = float(v)
-                        except Exception:
-                            num = None
-                        sample[label] = num
-                        line_parts.append(f"{label}={v}")
-                except Exception as e:
-                    self.log(f"Error querying {label}: {e}")
+            # Formatting the echo line is skipped entirely when it is off
+            line_parts = [] if self._log_samples else None
+            for label in labels:
+                if label not in latest:
                     sample[label] = None
+                    continue
+                v = latest[label]
+                if v is None:
+                    sample[label] = None
+                    if line_parts is not None:
+                        line_parts.append(f"{label}=N/A")
+                    continue
 
-            self.log(" | ".join(line_parts))
-            self.data_queue.put(sample)
-
-            time.sleep(interval)
+                extract = extractors.get(label)
+                if extract is None:
+                    extract = quantity_magnitude if hasattr(v, "magnitude") else float
+                    extractors[label] = extract
+                try:
+                    num = extract(v)
+                except (AttributeError, TypeError, ValueError):
+                    num = None
+                sample[label] = num
+                if line_parts is not None:
+                    line_parts.append(f"{label}={v}")
+
+            if line_parts is not None:
+                self.log(" | ".join(line_parts))
+            self.data_queue.append(sample)
+            self._notify_queues()
+
+            # CSV rows go straight from here to the writer thread
+            if self._csv_running:
+                csv_queue = self._csv_queue
+                # csv writes None as an empty field, matching "no reading"
+                csv_queue.append((self._csv_ts(sample["timestamp"]), *(sample[lbl] for lbl in labels)))
+                if self._csv_idle or len(csv_queue) >= CSV_BATCH_ROWS:
+                    self._csv_wakeup.set()
 
     def _open_new_csv(self, labels):
         self._close_csv()
         ts = time.strftime("%Y%m%d_%H%M%S")
         filename = f"obd_log_{ts}.csv"
         try:
-            self.csv_file = open(filename, mode="w", newline="")
+            self.csv_file = open(filename, mode="w", newline="", buffering=CSV_BUFFER_SIZE)
             self.csv_writer = csv.writer(self.csv_file)
-            self.csv_log_labels = list(labels)
-            header = ["Timestamp"] + self.csv_log_labels
+            self.csv_log_labels = tuple(labels)
+            header = ["Timestamp", *self.csv_log_labels]
             self.csv_writer.writerow(header)
+
+            self._csv_queue.clear()
+            self._csv_wakeup.clear()
+            self._csv_running = True
+            self._csv_thread = threading.Thread(target=self._csv_writer_loop, daemon=True)
+            self._csv_thread.start()
+
             self.csv_label.setText(f"Log file: {filename}")
             self.log(f"Logging to CSV: {filename}")
         except Exception as e:
@@ -830,6 +1376,14 @@ class OBDMainWindow(QtWidgets.QMainWindow):
             self.csv_label.setText("Log file: (none)")
 
     def _close_csv(self):
+        # Let the writer drain what is already queued before the file closes
+        if self._csv_thread is not None:
+            self._csv_running = False
+            self._csv_wakeup.set()
+            self._csv_thread.join()
+            self._csv_thread = None
+        self._csv_running = False
+
         if self.csv_file:
             try:
                 self.csv_file.close()
@@ -837,7 +1391,48 @@ class OBDMainWindow(QtWidgets.QMainWindow):
                 pass
         self.csv_file = None
         self.csv_writer = None
-        self.csv_log_labels = []
+        self.csv_log_labels = ()
+
+    def _csv_writer_loop(self):
+        """Write queued rows on a background thread so disk stalls never block the UI."""
+        queue = self._csv_queue
+        last_flush = time.monotonic()
+        unflushed = False
+        while True:
+            # Timed waits only while there is work outstanding; otherwise
+            # block until new rows (or _close_csv) wake the thread
+            if queue:
+                self._csv_wakeup.wait(CSV_BATCH_INTERVAL)
+            elif unflushed:
+                self._csv_wakeup.wait(max(0.0, last_flush + CSV_FLUSH_INTERVAL - time.monotonic()))
+            else:
+                self._csv_idle = True
+                if not queue:
+                    self._csv_wakeup.wait()
+                self._csv_idle = False
+            self._csv_wakeup.clear()
+            running = self._csv_running
+
+            try:
+                while queue:
+                    batch = [queue.popleft() for _ in range(min(len(queue), CSV_BATCH_ROWS))]
+                    self.csv_writer.writerows(batch)
+                    unflushed = True
+                # Batches fill the file buffer; flushing is on a clock so a
+                # crash loses at most about CSV_FLUSH_INTERVAL of rows
+                now = time.monotonic()
+                if unflushed and (not running or now - last_flush >= CSV_FLUSH_INTERVAL):
+                    self.csv_file.flush()
+                    last_flush = now
+                    unflushed = False
+            except Exception as e:
+                self.log(f"CSV write error: {e}")
+                self._csv_running = False
+                self._csv_queue.clear()
+                return
+
+            if not running:
+                return
 
     def load_log_file(self):
         path, _ = QtWidgets.QFileDialog.getOpenFileName(
@@ -850,12 +1445,12 @@ class OBDMainWindow(QtWidgets.QMainWindow):
             return
 
         self.stop_polling()
-        self.data_history.clear()
+        self._reset_history((), 1)
         self.session_start_time = None
 
         base_ts = None
-        row_count = 0
         labels = []
+        rows = []
 
         try:
             with open(path, newline="") as f:
@@ -868,8 +1463,6 @@ class OBDMainWindow(QtWidgets.QMainWindow):
                     return
 
                 labels = header[1:]
-                for label in labels:
-                    self.data_history[label] = {"t": [], "v": []}
 
                 for row in reader:
                     if len(row) < 1:
@@ -883,17 +1476,15 @@ class OBDMainWindow(QtWidgets.QMainWindow):
                         base_ts = ts
                     t_rel = ts - base_ts
 
+                    values = {}
                     for label, value in zip(labels, row[1:]):
                         if value == "":
                             continue
                         try:
-                            num = float(value)
+                            values[label] = float(value)
                         except Exception:
                             continue
-                        self.data_history[label]["t"].append(t_rel)
-                        self.data_history[label]["v"].append(num)
-
-                    row_count += 1
+                    rows.append((t_rel, values))
         except Exception as e:
             QtWidgets.QMessageBox.critical(
                 self, "Error", f"Failed to read log file:\n{e}"
@@ -901,10 +1492,15 @@ class OBDMainWindow(QtWidgets.QMainWindow):
             self.log(f"Failed to read log file {path}: {e}")
             return
 
+        row_count = len(rows)
         if row_count == 0 or base_ts is None:
             QtWidgets.QMessageBox.information(self, "Info", "No data found in log file.")
             return
 
+        # Sized to the file so a loaded log is never truncated
+        self._reset_history(labels, row_count)
+        self.data_history.extend([t_rel for t_rel, _ in rows], [values for _, values in rows])
+
         self.session_start_time = base_ts
         self._populate_graph_lists(labels)
         self.csv_label.setText(f"Log file: {QtCore.QFileInfo(path).fileName()}")
@@ -913,14 +1509,19 @@ class OBDMainWindow(QtWidgets.QMainWindow):
     # ------------------------------------------------------------------
     # DTCs
     # ------------------------------------------------------------------
+    def _query_now(self, cmd):
+        """Blocking one-off query; obd.Async.query() only returns watched values."""
+        with self.connection.paused():
+            return obd.OBD.query(self.connection, cmd)
+
     def read_dtc(self):
-        if not self.connection or not self.connection.is_connected():
+        if not self._connected:
             QtWidgets.QMessageBox.warning(self, "Warning", "Not connected to ECU.")
             return
 
         self.log("Reading DTCs...")
         try:
-            resp = self.connection.query(obd.commands.GET_DTC)
+            resp = self._query_now(obd.commands.GET_DTC)
             if resp.is_null():
                 self.log("No DTC data or unsupported command.")
                 return
@@ -935,7 +1536,7 @@ class OBDMainWindow(QtWidgets.QMainWindow):
             self.log(f"Error reading DTCs: {e}")
 
     def clear_dtc(self):
-        if not self.connection or not self.connection.is_connected():
+        if not self._connected:
             QtWidgets.QMessageBox.warning(self, "Warning", "Not connected to ECU.")
             return
 
@@ -950,7 +1551,7 @@ class OBDMainWindow(QtWidgets.QMainWindow):
 
         self.log("Clearing DTCs...")
         try:
-            resp = self.connection.query(obd.commands.CLEAR_DTC)
+            resp = self._query_now(obd.commands.CLEAR_DTC)
             if resp.is_null():
                 self.log("No response or unsupported command.")
             else:
@@ -961,80 +1562,184 @@ class OBDMainWindow(QtWidgets.QMainWindow):
     # ------------------------------------------------------------------
     # Plotting (three panes)
     # ------------------------------------------------------------------
+    def _on_graph_selection_changed(self, *_):
+        for view in self.graph_views:
+            self._rebuild_plot_artists(view)
+        self.refresh_plot()
+
+    def _rebuild_plot_artists(self, view):
+        """Replace the cached lines and legend for each pane's checked labels.
+
+        Axes keep the styling applied in _create_figure; only the artists
+        that depend on the selection are swapped. Per-sample refreshes just
+        push new data into these lines.
+        """
+        axes = view["axes"]
+        for lines in view["lines"]:
+            for line in lines.values():
+                line.remove()
+
+        view["lines"] = []
+        view["ybounds"] = {}
+        view["background"] = None
+        for ax, lst in zip(axes, self.graph_lists):
+            legend = ax.get_legend()
+            if legend is not None:
+                legend.remove()
+
+            labels = self._checked_labels(lst)
+            color_cycle = cycle(self.plot_colors)
+            lines = {}
+
+            for label in labels:
+                (line,) = ax.plot(
+                    [],
+                    [],
+                    linewidth=2.0,
+                    label=label,
+                    color=next(color_cycle),
+                    marker="o",
+                    markersize=3,
+                    markerfacecolor=PLOT_MARKER_FACE,
+                    markeredgewidth=0.6,
+                )
+                lines[label] = line
+
+            # The label colour was set once in _style_axis
+            ax.set_ylabel(" / ".join(labels))
+            # Animated artists are left out of full draws and blitted on top
+            # of the cached background by _draw_lines, legend last
+            for line in lines.values():
+                line.set_animated(True)
+            if lines:
+                legend = ax.legend(
+                    loc="upper left",
+                    fontsize=8,
+                    facecolor=PLOT_BG,
+                    edgecolor=PLOT_GRID,
+                    labelcolor=PLOT_FG,
+                    framealpha=0.9,
+                )
+                legend.set_animated(True)
+
+            view["lines"].append(lines)
+
+    @staticmethod
+    def _view_visible(view) -> bool:
+        canvas = view["canvas"]
+        return canvas.isVisible() and not canvas.window().isMinimized()
+
+    def _mark_plot_dirty(self):
+        self._plot_dirty = True
+        # While every graph is hidden the flag just stays set; _on_graph_shown
+        # does the catch-up redraw
+        if not self._plot_timer.isActive() and any(map(self._view_visible, self.graph_views)):
+            self._plot_timer.start()
+
+    def _on_graph_shown(self):
+        if self._plot_dirty:
+            self._mark_plot_dirty()
+
+    def _maybe_refresh_plot(self):
+        if not self._plot_dirty:
+            return
+        self._plot_dirty = False
+        self.refresh_plot()
+
+    def _plot_series(self, view, label, t_win, columns, n_bins, stamp):
+        """Gap-free, pixel-decimated (t, v) for one label and its (min, max) v.
+
+        Results are cached per view and reused while the history, window and
+        pane width are unchanged; the bounds are None when there is nothing
+        to plot.
+        """
+        key = (id(view), label)
+        stamp = (*stamp, n_bins)
+        cached = self._plot_cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1], cached[2]
+
+        data, bounds = ([], []), None
+        col = columns.get(label)
+        if col is not None:
+            mask = np.isfinite(col)
+            data = m4_downsample(t_win[mask], col[mask], n_bins)
+            if len(data[1]):
+                bounds = (float(data[1].min()), float(data[1].max()))
+        self._plot_cache[key] = (stamp, data, bounds)
+        return data, bounds
+
     def refresh_plot(self):
         window_sec = float(self.graph_window_spin.value())
+        t_win, columns = self.data_history.window(window_sec)
+        stamp = (self.data_history.version, window_sec)
 
         for view in self.graph_views:
+            # Hidden views are brought up to date by the refresh after they reappear
+            if not self._view_visible(view):
+                self._plot_dirty = True
+                continue
             axes = view["axes"]
             canvas = view["canvas"]
-
-            # Re-style all axes, but only bottom shows x-label
-            self._style_all_axes(axes)
-
-            for ax, lst in zip(axes, self.graph_lists):
-                labels = self._checked_labels(lst)
-                if not labels:
+            relayout = view["background"] is None
+
+            # Axes share x; only move it once the data drifts out of the
+            # current range (or leaves too much empty space after a window change)
+            if len(t_win):
+                t_first, t_last = float(t_win[0]), float(t_win[-1])
+                x0, x1 = axes[0].get_xlim()
+                headroom = PLOT_X_HEADROOM * max(t_last - t_first, 1.0)
+                if not (t_first - headroom <= x0 <= t_first
+                        and t_last <= x1 <= t_last + 2 * headroom):
+                    axes[0].set_xlim(t_first, t_last + headroom)
+                    relayout = True
+
+            # One M4 bin per horizontal pixel (all panes share the width)
+            n_bins = int(axes[0].bbox.width)
+
+            for ax, lines in zip(axes, view["lines"]):
+                if not lines:
                     continue
 
-                color_cycle = cycle(self.plot_colors)
-                any_plotted = False
-
-                for label in labels:
-                    if label not in self.data_history:
-                        continue
-                    t_all = self.data_history[label]["t"]
-                    v_all = self.data_history[label]["v"]
-                    if not t_all or not v_all:
-                        continue
-
-                    if window_sec > 0:
-                        t_last = t_all[-1]
-                        t0 = t_last - window_sec
-                        filtered = [(t, v) for t, v in zip(t_all, v_all) if t >= t0]
-                        if filtered:
-                            t, v = zip(*filtered)
-                        else:
-                            t, v = [], []
-                    else:
-                        t, v = t_all, v_all
-
-                    if t and v:
-                        color = next(color_cycle)
-                        ax.plot(
-                            t,
-                            v,
-                            linewidth=2.0,
-                            label=label,
-                            color=color,
-                            marker="o",
-                            markersize=3,
-                            markerfacecolor="#121314",
-                            markeredgewidth=0.6,
-                        )
-                        any_plotted = True
-                        ax.set_ylabel(" / ".join(labels), color="#e8eaed")
-
-                if any_plotted:
-                    legend = ax.legend(
-                        loc="upper left",
-                        fontsize=8,
-                        facecolor="#202124",
-                        edgecolor="#3c4043",
-                        framealpha=0.9,
-                    )
-                    for text in legend.get_texts():
-                        text.set_color("#e8eaed")
+                lo = hi = None
+                for label, line in lines.items():
+                    data, bounds = self._plot_series(view, label, t_win, columns, n_bins, stamp)
+                    line.set_data(*data)
+                    if bounds is not None:
+                        lo = bounds[0] if lo is None else min(lo, bounds[0])
+                        hi = bounds[1] if hi is None else max(hi, bounds[1])
+                if lo is None:
+                    continue
 
-            canvas.draw_idle()
+                # relim() walks every line's data; only refit y when the
+                # cheap bounds check says the fit is out of date
+                fitted = view["ybounds"].get(ax)
+                if (fitted is None or lo < fitted[0] or hi > fitted[1]
+                        or hi - lo < PLOT_Y_SHRINK * (fitted[1] - fitted[0])):
+                    view["ybounds"][ax] = (lo, hi)
+                    ylim = ax.get_ylim()
+                    ax.relim()
+                    ax.autoscale_view(scalex=False, scaley=True)
+                    if ax.get_ylim() != ylim:
+                        relayout = True
+
+            if relayout:
+                # Full draw; draw_event then re-caches the background
+                view["background"] = None
+                canvas.draw_idle()
+            else:
+                canvas.restore_region(view["background"])
+                self._draw_lines(view)
+                canvas.blit(view["fig"].bbox)
 
     def _fetch_vehicle_details(self) -> str:
-        if not self.connection or not self.connection.is_connected():
+        if not self._connected:
             return "Vehicle info: —"
 
         vin_text = None
         protocol = getattr(self.connection, "protocol_name", None) or "Unknown protocol"
         try:
-            vin_resp = self.connection.query(obd.commands.VIN)
+            vin_resp = self._query_now(obd.commands.VIN)
             if not vin_resp.is_null() and vin_resp.value:
                 vin_text = str(vin_resp.value)
         except Exception:
@@ -1042,7 +1747,7 @@ class OBDMainWindow(QtWidgets.QMainWindow):
 
         ecu_name = None
         try:
-            ecu_resp = self.connection.query(obd.commands.ELM_VERSION)
+            ecu_resp = self._query_now(obd.commands.ELM_VERSION)
             if not ecu_resp.is_null() and ecu_resp.value:
                 ecu_name = str(ecu_resp.value)
         except Exception:
@@ -1060,8 +1765,13 @@ class OBDMainWindow(QtWidgets.QMainWindow):
         return info
 
     # ------------------------------------------------------------------
-    # Close event
+    # Window events
     # ------------------------------------------------------------------
+    def changeEvent(self, event: QtCore.QEvent):
+        if event.type() == QtCore.QEvent.WindowStateChange and not self.isMinimized():
+            self._on_graph_shown()
+        super().changeEvent(event)
+
     def closeEvent(self, event: QtGui.QCloseEvent):
         self.stop_polling()
         if self.popup_window:
@@ -1069,7 +1779,7 @@ class OBDMainWindow(QtWidgets.QMainWindow):
                 self.popup_window.close()
             except Exception:
                 pass
-        if self.connection and self.connection.is_connected():
+        if self._connected:
             try:
                 self.connection.close()
             except Exception: